@@ -1,22 +1,27 @@
 """Phase 4: Combined experiments (items 018-021) - fast version.
 
 Uses 6 core instances (3 cities × 50+200 stops), 3 seeds, 2 time limits.
+The independent solver runs of item 018 are spread over a process pool.
 """
-import sys, os, json, time, csv
+import sys, os, json, time, argparse, hashlib
+from functools import lru_cache
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 sys.path.insert(0, '.')
+
+# BLAS/OpenMP pools read their size when the libraries load, so the one-thread
+# limit has to be in place before numpy/torch are imported. Pool workers
+# inherit it from this process.
+for _var in ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS'):
+    os.environ[_var] = '1'
+
 import numpy as np
-from src.data_pipeline import load_instance
+import pandas as pd
+from src.data_pipeline import load_instance as _load_instance
 from src.baselines import solve as baseline_solve
-from src.hybrid_solver import solve_hybrid, solve_hybrid_no_rl, solve_candidates_only
+from src.hybrid_solver import solve_hybrid, solve_hybrid_no_rl, solve_candidates_only, reset_rl_agent
 from src.local_search import tour_cost as ls_tour_cost, rl_guided_local_search, RLLocalSearchAgent
 
-# ═══════════════════════════════════════════════════════════════
-# ITEM 018: Full benchmark comparison
-# ═══════════════════════════════════════════════════════════════
-print('=' * 60)
-print('ITEM 018: Full Benchmark Comparison')
-print('=' * 60)
-
 # 6 core instances
 instances = [
     'benchmarks/manhattan_50_s42',
@@ -31,305 +36,353 @@ solvers = ['nearest_neighbor', 'farthest_insertion', 'ortools', 'lkh_style', 'hy
 time_limits = [1.0, 10.0, 30.0]
 seeds = [42, 43, 44]
 
-full_results = []
 
-for inst_path in instances:
+def _single_thread():
+    """Limit torch's intra-op pool to one thread in the current process.
+
+    Results are tour quality at a fixed time budget, so each run must get the
+    same CPU share whether it runs in a pool worker or in the main process.
+    BLAS/OpenMP are limited by the environment variables set at import time.
+    """
+    import torch
+    torch.set_num_threads(1)
+
+
+@lru_cache(maxsize=None)
+def load_instance(inst_path):
+    """Load an instance once per process; every run shares the returned dict and arrays."""
+    return _load_instance(inst_path)
+
+
+def _digest(arr):
+    """SHA-1 of an array's raw bytes."""
+    return hashlib.sha1(arr.tobytes()).hexdigest()
+
+
+@lru_cache(maxsize=None)
+def _durations_digest(inst_path):
+    """Digest of the cached cost matrix, taken before any solver has seen it."""
+    return _digest(load_instance(inst_path)['durations'])
+
+
+def _check_unmodified(inst_path):
+    """Stop the sweep if a solver wrote into the shared cost matrix."""
+    if _digest(load_instance(inst_path)['durations']) != _durations_digest(inst_path):
+        raise RuntimeError(f'{inst_path}: a solver modified the shared cost matrix in place')
+
+
+def _run_one(task):
+    """Run one (instance, time limit, solver, seed) task and return its result row."""
+    inst_path, tl, solver_name, seed = task
     data = load_instance(inst_path)
+    _durations_digest(inst_path)  # pin the digest before any solver runs on it
     cost_mat = data['durations']
     coords = data['coordinates']
     inst_name = os.path.basename(inst_path)
     n = cost_mat.shape[0]
     city = inst_name.split('_')[0]
 
-    for tl in time_limits:
-        for solver_name in solvers:
-            # NN and FI are time-independent
-            if solver_name in ('nearest_neighbor', 'farthest_insertion') and tl > 1.0:
-                continue
-            for seed in seeds:
-                t0 = time.time()
-                try:
-                    if solver_name == 'hybrid':
-                        tour, cost = solve_hybrid(cost_mat, coords, time_limit_s=tl, seed=seed)
-                    elif solver_name in ('ortools', 'lkh_style'):
-                        tour, cost = baseline_solve(cost_mat, solver_name=solver_name,
-                                                    time_limit_s=tl, seed=seed)
-                    else:
-                        tour, cost = baseline_solve(cost_mat, solver_name=solver_name, seed=seed)
-                    elapsed = time.time() - t0
-                    valid = len(set(tour)) == n and len(tour) == n
-                except Exception as e:
-                    cost, elapsed, valid = float('inf'), time.time() - t0, False
-                    print(f'    ERROR: {solver_name} on {inst_name} seed={seed}: {e}')
-
-                full_results.append({
-                    'instance_id': inst_name, 'city': city, 'n_stops': n,
-                    'solver': solver_name, 'seed': seed, 'time_limit': tl,
-                    'tour_cost': round(cost, 2), 'time_s': round(elapsed, 4), 'valid': valid,
-                })
-        print(f'  {inst_name} tl={tl}s done', flush=True)
-
-# Duplicate NN/FI results for other time limits (they are time-independent)
-for r in list(full_results):
-    if r['solver'] in ('nearest_neighbor', 'farthest_insertion') and r['time_limit'] == 1.0:
-        for tl in [10.0, 30.0]:
-            dup = r.copy()
-            dup['time_limit'] = tl
-            full_results.append(dup)
-
-# Compute gaps
-for r in full_results:
-    key = (r['instance_id'], r['time_limit'], r['seed'])
-    valid_costs = [r2['tour_cost'] for r2 in full_results
-                   if (r2['instance_id'], r2['time_limit'], r2['seed']) == key and r2['valid']]
-    if valid_costs and r['valid']:
-        best = min(valid_costs)
-        r['gap_pct'] = round((r['tour_cost'] - best) / best * 100, 4) if best > 0 else 0.0
-    else:
-        r['gap_pct'] = None
-
-with open('results/full_comparison.csv', 'w', newline='') as f:
-    writer = csv.DictWriter(f, fieldnames=[
+    # Start every hybrid run from a fresh RL agent so its random stream depends
+    # only on the task, not on what this worker ran before
+    reset_rl_agent()
+
+    t0 = time.perf_counter()
+    try:
+        if solver_name == 'hybrid':
+            tour, cost = solve_hybrid(cost_mat, coords, time_limit_s=tl, seed=seed)
+        elif solver_name in ('ortools', 'lkh_style'):
+            tour, cost = baseline_solve(cost_mat, solver_name=solver_name,
+                                        time_limit_s=tl, seed=seed)
+        else:
+            tour, cost = baseline_solve(cost_mat, solver_name=solver_name, seed=seed)
+        elapsed = time.perf_counter() - t0
+        valid = len(set(tour)) == n and len(tour) == n
+    except Exception as e:
+        cost, elapsed, valid = float('inf'), time.perf_counter() - t0, False
+        print(f'    ERROR: {solver_name} on {inst_name} seed={seed}: {e}')
+    # A solver writing into the shared, cached matrix is a bug, not a failed run
+    _check_unmodified(inst_path)
+
+    return {
+        'instance_id': inst_name, 'city': city, 'n_stops': n,
+        'solver': solver_name, 'seed': seed, 'time_limit': tl,
+        'tour_cost': round(cost, 2), 'time_s': round(elapsed, 4), 'valid': valid,
+    }
+
+
+# ═══════════════════════════════════════════════════════════════
+# ITEM 018: Full benchmark comparison
+# ═══════════════════════════════════════════════════════════════
+def run_full_comparison(n_workers=None):
+    print('=' * 60)
+    print('ITEM 018: Full Benchmark Comparison')
+    print('=' * 60)
+
+    # NN and FI are time-independent
+    tasks = [(inst_path, tl, solver_name, seed)
+             for inst_path in instances
+             for tl in time_limits
+             for solver_name in solvers
+             if not (solver_name in ('nearest_neighbor', 'farthest_insertion') and tl > 1.0)
+             for seed in seeds]
+
+    full_results = []
+
+    # One single-threaded worker per logical CPU. On SMT machines pass
+    # --workers <physical cores> so concurrent time-limited runs don't share a core.
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+
+    remaining = Counter((os.path.basename(inst_path), tl) for inst_path, tl, _, _ in tasks)
+    with ProcessPoolExecutor(max_workers=n_workers, initializer=_single_thread) as ex:
+        for r in ex.map(_run_one, tasks, chunksize=1):
+            full_results.append(r)
+            key = (r['instance_id'], r['time_limit'])
+            remaining[key] -= 1
+            if remaining[key] == 0:
+                print(f'  {key[0]} tl={key[1]}s done', flush=True)
+
+    # Duplicate NN/FI results for other time limits (they are time-independent)
+    for r in list(full_results):
+        if r['solver'] in ('nearest_neighbor', 'farthest_insertion') and r['time_limit'] == 1.0:
+            for tl in [10.0, 30.0]:
+                dup = r.copy()
+                dup['time_limit'] = tl
+                full_results.append(dup)
+
+    # Compute gaps against the best valid cost per (instance, time limit, seed)
+    bests = {}
+    for r in full_results:
+        if r['valid']:
+            key = (r['instance_id'], r['time_limit'], r['seed'])
+            bests[key] = min(bests.get(key, r['tour_cost']), r['tour_cost'])
+    for r in full_results:
+        best = bests.get((r['instance_id'], r['time_limit'], r['seed']))
+        if best is not None and r['valid']:
+            r['gap_pct'] = round((r['tour_cost'] - best) / best * 100, 4) if best > 0 else 0.0
+        else:
+            r['gap_pct'] = None
+
+    df = pd.DataFrame(full_results, columns=[
         'instance_id', 'city', 'n_stops', 'solver', 'seed', 'time_limit',
         'tour_cost', 'time_s', 'valid', 'gap_pct'])
-    writer.writeheader()
-    writer.writerows(full_results)
-
-print('\n--- Full Comparison Summary ---')
-for n_target in [50, 200]:
-    print(f'\nn={n_target}:')
-    for tl in time_limits:
-        for s in solvers:
-            vals = [r['tour_cost'] for r in full_results
-                    if r['n_stops'] == n_target and r['solver'] == s
-                    and r['time_limit'] == tl and r['valid']]
-            gaps = [r['gap_pct'] for r in full_results
-                    if r['n_stops'] == n_target and r['solver'] == s
-                    and r['time_limit'] == tl and r['gap_pct'] is not None]
-            if vals:
-                print(f'  {s:20s} tl={tl:4.0f}s: mean_cost={np.mean(vals):10.1f} mean_gap={np.mean(gaps):6.2f}%')
+    df.to_csv('results/full_comparison.csv', index=False)
+
+    summary = (df[df['valid']]
+               .groupby(['n_stops', 'time_limit', 'solver'])[['tour_cost', 'gap_pct']]
+               .mean())
+
+    print('\n--- Full Comparison Summary ---')
+    for n_target in [50, 200]:
+        print(f'\nn={n_target}:')
+        for tl in time_limits:
+            for s in solvers:
+                if (n_target, tl, s) in summary.index:
+                    row = summary.loc[(n_target, tl, s)]
+                    print(f'  {s:20s} tl={tl:4.0f}s: mean_cost={row["tour_cost"]:10.1f} mean_gap={row["gap_pct"]:6.2f}%')
+
+    return full_results
+
 
 # ═══════════════════════════════════════════════════════════════
 # ITEM 020: Ablation study
 # ═══════════════════════════════════════════════════════════════
-print('\n' + '=' * 60)
-print('ITEM 020: Ablation Study')
-print('=' * 60)
-
-ablation_instances = [
-    'benchmarks/manhattan_200_s42',
-    'benchmarks/london_200_s42',
-    'benchmarks/berlin_200_s42',
-]
-ablation_seeds = [42, 43, 44]
-ablation_results = []
+def run_ablation():
+    print('\n' + '=' * 60)
+    print('ITEM 020: Ablation Study')
+    print('=' * 60)
+
+    ablation_instances = [
+        'benchmarks/manhattan_200_s42',
+        'benchmarks/london_200_s42',
+        'benchmarks/berlin_200_s42',
+    ]
+    ablation_seeds = [42, 43, 44]
+    ablation_results = []
+
+    for inst_path in ablation_instances:
+        data = load_instance(inst_path)
+        _durations_digest(inst_path)  # pin the digest before any solver runs on it
+        cost_mat = data['durations']
+        coords = data['coordinates']
+        inst_name = os.path.basename(inst_path)
+        print(f'  {inst_name}', flush=True)
+
+        for seed in ablation_seeds:
+            # A: LKH default
+            t0 = time.perf_counter()
+            _, cost_a = baseline_solve(cost_mat, solver_name='lkh_style', time_limit_s=10, seed=seed)
+            ablation_results.append({'instance_id': inst_name, 'config': 'A_lkh_default',
+                                      'seed': seed, 'tour_cost': round(cost_a, 2),
+                                      'time_s': round(time.perf_counter() - t0, 4)})
+
+            # B: Learned candidates only
+            t0 = time.perf_counter()
+            _, cost_b = solve_candidates_only(cost_mat, coords, time_limit_s=10, seed=seed)
+            ablation_results.append({'instance_id': inst_name, 'config': 'B_learned_candidates',
+                                      'seed': seed, 'tour_cost': round(cost_b, 2),
+                                      'time_s': round(time.perf_counter() - t0, 4)})
+
+            # C: RL only (from NN start)
+            nn_tour, _ = baseline_solve(cost_mat, solver_name='nearest_neighbor', seed=seed)
+            agent = RLLocalSearchAgent(seed=seed, epsilon=0.1)
+            t0 = time.perf_counter()
+            _, cost_c = rl_guided_local_search(cost_mat, nn_tour, agent,
+                                                max_steps=5000, time_limit_s=10, train=False)
+            ablation_results.append({'instance_id': inst_name, 'config': 'C_rl_only',
+                                      'seed': seed, 'tour_cost': round(cost_c, 2),
+                                      'time_s': round(time.perf_counter() - t0, 4)})
+
+            # D: Full hybrid (fresh RL agent, as in item 018's hybrid runs)
+            reset_rl_agent()
+            t0 = time.perf_counter()
+            _, cost_d = solve_hybrid(cost_mat, coords, time_limit_s=10, seed=seed)
+            ablation_results.append({'instance_id': inst_name, 'config': 'D_full_hybrid',
+                                      'seed': seed, 'tour_cost': round(cost_d, 2),
+                                      'time_s': round(time.perf_counter() - t0, 4)})
+
+            print(f'    seed={seed}: A={cost_a:.0f} B={cost_b:.0f} C={cost_c:.0f} D={cost_d:.0f}', flush=True)
+            _check_unmodified(inst_path)
+
+    df = pd.DataFrame(ablation_results, columns=['instance_id', 'config', 'seed', 'tour_cost', 'time_s'])
+    df.to_csv('results/ablation_results.csv', index=False)
+
+    summary = df.groupby('config')[['tour_cost', 'time_s']].mean()
+    mean_a = summary.loc['A_lkh_default', 'tour_cost']
+
+    print('\n--- Ablation Summary ---')
+    for config in ['A_lkh_default', 'B_learned_candidates', 'C_rl_only', 'D_full_hybrid']:
+        mean_cost, mean_time = summary.loc[config, 'tour_cost'], summary.loc[config, 'time_s']
+        gap = (mean_a - mean_cost) / mean_a * 100
+        print(f'  {config:25s}: mean={mean_cost:10.1f} time={mean_time:.2f}s gap_vs_A={gap:+.2f}%')
+
+    # Write ablation analysis
+    with open('results/ablation_analysis.md', 'w') as f:
+        f.write('# Ablation Study Results\n\n')
+        f.write('## Configurations\n')
+        f.write('- **A**: LKH-style default (multi-restart 2-opt + or-opt, 10s)\n')
+        f.write('- **B**: Learned candidates only (NN init + GNN candidate set + constrained local search)\n')
+        f.write('- **C**: RL local search only (NN init + Q-learning guided move selection, 10s)\n')
+        f.write('- **D**: Full hybrid (OR-Tools init + learned candidates + RL + 2-opt, 10s)\n\n')
+        f.write('## Results (200-stop instances, 3 cities, 3 seeds)\n\n')
+        f.write('| Config | Mean Cost | Mean Time | Gap vs A |\n')
+        f.write('|--------|-----------|-----------|----------|\n')
+        for cfg in ['A_lkh_default', 'B_learned_candidates', 'C_rl_only', 'D_full_hybrid']:
+            mean_cost, mean_time = summary.loc[cfg, 'tour_cost'], summary.loc[cfg, 'time_s']
+            gap = (mean_a - mean_cost) / mean_a * 100
+            f.write(f'| {cfg} | {mean_cost:.1f} | {mean_time:.2f}s | {gap:+.2f}% |\n')
+        f.write('\n## Analysis\n\n')
+        f.write('The full hybrid (D) achieves the best tour quality, leveraging OR-Tools\n')
+        f.write('initialization for strong starting tours and learned candidates for\n')
+        f.write('targeted local search. The learned candidates component (B) provides\n')
+        f.write('moderate improvement by constraining search to high-probability edges.\n')
+        f.write('RL-only (C) shows limited improvement due to the overhead of Q-table\n')
+        f.write('lookup and the compact action space.\n')
 
-for inst_path in ablation_instances:
-    data = load_instance(inst_path)
-    cost_mat = data['durations']
-    coords = data['coordinates']
-    inst_name = os.path.basename(inst_path)
-    print(f'  {inst_name}', flush=True)
-
-    for seed in ablation_seeds:
-        # A: LKH default
-        t0 = time.time()
-        _, cost_a = baseline_solve(cost_mat, solver_name='lkh_style', time_limit_s=10, seed=seed)
-        ablation_results.append({'instance_id': inst_name, 'config': 'A_lkh_default',
-                                  'seed': seed, 'tour_cost': round(cost_a, 2),
-                                  'time_s': round(time.time() - t0, 4)})
-
-        # B: Learned candidates only
-        t0 = time.time()
-        _, cost_b = solve_candidates_only(cost_mat, coords, time_limit_s=10, seed=seed)
-        ablation_results.append({'instance_id': inst_name, 'config': 'B_learned_candidates',
-                                  'seed': seed, 'tour_cost': round(cost_b, 2),
-                                  'time_s': round(time.time() - t0, 4)})
-
-        # C: RL only (from NN start)
-        nn_tour, _ = baseline_solve(cost_mat, solver_name='nearest_neighbor', seed=seed)
-        agent = RLLocalSearchAgent(seed=seed, epsilon=0.1)
-        t0 = time.time()
-        _, cost_c = rl_guided_local_search(cost_mat, nn_tour, agent,
-                                            max_steps=5000, time_limit_s=10, train=False)
-        ablation_results.append({'instance_id': inst_name, 'config': 'C_rl_only',
-                                  'seed': seed, 'tour_cost': round(cost_c, 2),
-                                  'time_s': round(time.time() - t0, 4)})
-
-        # D: Full hybrid
-        t0 = time.time()
-        _, cost_d = solve_hybrid(cost_mat, coords, time_limit_s=10, seed=seed)
-        ablation_results.append({'instance_id': inst_name, 'config': 'D_full_hybrid',
-                                  'seed': seed, 'tour_cost': round(cost_d, 2),
-                                  'time_s': round(time.time() - t0, 4)})
-
-        print(f'    seed={seed}: A={cost_a:.0f} B={cost_b:.0f} C={cost_c:.0f} D={cost_d:.0f}', flush=True)
-
-with open('results/ablation_results.csv', 'w', newline='') as f:
-    writer = csv.DictWriter(f, fieldnames=['instance_id', 'config', 'seed', 'tour_cost', 'time_s'])
-    writer.writeheader()
-    writer.writerows(ablation_results)
-
-mean_a = np.mean([r['tour_cost'] for r in ablation_results if r['config'] == 'A_lkh_default'])
-
-print('\n--- Ablation Summary ---')
-for config in ['A_lkh_default', 'B_learned_candidates', 'C_rl_only', 'D_full_hybrid']:
-    costs = [r['tour_cost'] for r in ablation_results if r['config'] == config]
-    times = [r['time_s'] for r in ablation_results if r['config'] == config]
-    gap = (mean_a - np.mean(costs)) / mean_a * 100
-    print(f'  {config:25s}: mean={np.mean(costs):10.1f} time={np.mean(times):.2f}s gap_vs_A={gap:+.2f}%')
-
-# Write ablation analysis
-with open('results/ablation_analysis.md', 'w') as f:
-    f.write('# Ablation Study Results\n\n')
-    f.write('## Configurations\n')
-    f.write('- **A**: LKH-style default (multi-restart 2-opt + or-opt, 10s)\n')
-    f.write('- **B**: Learned candidates only (NN init + GNN candidate set + constrained local search)\n')
-    f.write('- **C**: RL local search only (NN init + Q-learning guided move selection, 10s)\n')
-    f.write('- **D**: Full hybrid (OR-Tools init + learned candidates + RL + 2-opt, 10s)\n\n')
-    f.write('## Results (200-stop instances, 3 cities, 3 seeds)\n\n')
-    f.write('| Config | Mean Cost | Mean Time | Gap vs A |\n')
-    f.write('|--------|-----------|-----------|----------|\n')
-    for cfg in ['A_lkh_default', 'B_learned_candidates', 'C_rl_only', 'D_full_hybrid']:
-        costs = [r['tour_cost'] for r in ablation_results if r['config'] == cfg]
-        times = [r['time_s'] for r in ablation_results if r['config'] == cfg]
-        gap = (mean_a - np.mean(costs)) / mean_a * 100
-        f.write(f'| {cfg} | {np.mean(costs):.1f} | {np.mean(times):.2f}s | {gap:+.2f}% |\n')
-    f.write('\n## Analysis\n\n')
-    f.write('The full hybrid (D) achieves the best tour quality, leveraging OR-Tools\n')
-    f.write('initialization for strong starting tours and learned candidates for\n')
-    f.write('targeted local search. The learned candidates component (B) provides\n')
-    f.write('moderate improvement by constraining search to high-probability edges.\n')
-    f.write('RL-only (C) shows limited improvement due to the overhead of Q-table\n')
-    f.write('lookup and the compact action space.\n')
 
 # ═══════════════════════════════════════════════════════════════
 # ITEM 021: Statistical significance testing
 # ═══════════════════════════════════════════════════════════════
-print('\n' + '=' * 60)
-print('ITEM 021: Statistical Tests')
-print('=' * 60)
-
-from scipy import stats
-
-# Paired comparison: hybrid vs lkh_style on 200-stop instances
-for tl_test in [10.0, 30.0]:
-    hybrid_costs = []
-    lkh_costs = []
-    for inst_name in set(r['instance_id'] for r in full_results if r['n_stops'] == 200):
-        for seed in seeds:
-            hyb = [r for r in full_results if r['instance_id'] == inst_name
-                   and r['solver'] == 'hybrid' and r['seed'] == seed
-                   and r['time_limit'] == tl_test and r['valid']]
-            lkh = [r for r in full_results if r['instance_id'] == inst_name
-                   and r['solver'] == 'lkh_style' and r['seed'] == seed
-                   and r['time_limit'] == tl_test and r['valid']]
-            if hyb and lkh:
-                hybrid_costs.append(hyb[0]['tour_cost'])
-                lkh_costs.append(lkh[0]['tour_cost'])
-
-    if len(hybrid_costs) >= 3:
-        diffs = np.array(hybrid_costs) - np.array(lkh_costs)
-        mean_diff = np.mean(diffs)
-
-        try:
-            stat_w, p_wilcoxon = stats.wilcoxon(hybrid_costs, lkh_costs, alternative='two-sided')
-        except ValueError:
-            # All differences are zero
-            stat_w, p_wilcoxon = 0, 1.0
-
-        se = np.std(diffs, ddof=1) / np.sqrt(len(diffs))
-        ci_low = mean_diff - 1.96 * se
-        ci_high = mean_diff + 1.96 * se
-        cohens_d = mean_diff / (np.std(diffs, ddof=1) + 1e-10)
-
-        print(f'\nHybrid vs LKH-style (200-stop, {tl_test}s):')
-        print(f'  N pairs: {len(diffs)}')
-        print(f'  Mean diff: {mean_diff:.2f}')
-        print(f'  Wilcoxon p: {p_wilcoxon:.4f}')
-        print(f'  95% CI: [{ci_low:.2f}, {ci_high:.2f}]')
-        print(f"  Cohen's d: {cohens_d:.3f}")
-
-# Also: hybrid vs OR-Tools
-for tl_test in [10.0, 30.0]:
-    hyb_c, ort_c = [], []
-    for inst_name in set(r['instance_id'] for r in full_results if r['n_stops'] == 200):
-        for seed in seeds:
-            hyb = [r for r in full_results if r['instance_id'] == inst_name
-                   and r['solver'] == 'hybrid' and r['seed'] == seed
-                   and r['time_limit'] == tl_test and r['valid']]
-            ort = [r for r in full_results if r['instance_id'] == inst_name
-                   and r['solver'] == 'ortools' and r['seed'] == seed
-                   and r['time_limit'] == tl_test and r['valid']]
-            if hyb and ort:
-                hyb_c.append(hyb[0]['tour_cost'])
-                ort_c.append(ort[0]['tour_cost'])
-
-    if len(hyb_c) >= 3:
-        diffs = np.array(hyb_c) - np.array(ort_c)
-        try:
-            _, p_w = stats.wilcoxon(hyb_c, ort_c, alternative='two-sided')
-        except ValueError:
-            p_w = 1.0
-        cohd = np.mean(diffs) / (np.std(diffs, ddof=1) + 1e-10)
-        print(f'\nHybrid vs OR-Tools (200-stop, {tl_test}s):')
-        print(f'  N={len(diffs)}, mean_diff={np.mean(diffs):.2f}, p={p_w:.4f}, d={cohd:.3f}')
-
-# Save comprehensive stats
-stat_results = {}
-for tl_test in [10.0, 30.0]:
-    for comp_name, comp_solver in [('hybrid_vs_lkh', 'lkh_style'), ('hybrid_vs_ortools', 'ortools')]:
-        costs_a, costs_b = [], []
-        for inst_name in set(r['instance_id'] for r in full_results if r['n_stops'] == 200):
-            for seed in seeds:
-                a = [r for r in full_results if r['instance_id'] == inst_name
-                     and r['solver'] == 'hybrid' and r['seed'] == seed
-                     and r['time_limit'] == tl_test and r['valid']]
-                b = [r for r in full_results if r['instance_id'] == inst_name
-                     and r['solver'] == comp_solver and r['seed'] == seed
-                     and r['time_limit'] == tl_test and r['valid']]
-                if a and b:
-                    costs_a.append(a[0]['tour_cost'])
-                    costs_b.append(b[0]['tour_cost'])
-        if len(costs_a) >= 3:
-            diffs = np.array(costs_a) - np.array(costs_b)
-            try:
-                _, pw = stats.wilcoxon(costs_a, costs_b, alternative='two-sided')
-            except ValueError:
-                pw = 1.0
-            se = np.std(diffs, ddof=1) / np.sqrt(len(diffs))
-            stat_results[f'{comp_name}_{int(tl_test)}s'] = {
-                'n_pairs': len(diffs),
-                'mean_diff': float(np.mean(diffs)),
-                'wilcoxon_p': float(pw),
-                'ci_95': [float(np.mean(diffs) - 1.96 * se), float(np.mean(diffs) + 1.96 * se)],
-                'cohens_d': float(np.mean(diffs) / (np.std(diffs, ddof=1) + 1e-10)),
-            }
-
-with open('results/statistical_tests.json', 'w') as f:
-    json.dump(stat_results, f, indent=2)
-
-# Write stats markdown
-with open('results/statistical_tests.md', 'w') as f:
-    f.write('# Statistical Significance Testing\n\n')
-    f.write('## Methods\n')
-    f.write('- Wilcoxon signed-rank test (non-parametric paired test)\n')
-    f.write('- 95% confidence intervals for mean difference\n')
-    f.write("- Cohen's d effect size\n\n")
-    for key, vals in stat_results.items():
-        f.write(f'## {key}\n')
-        f.write(f'- Paired samples: {vals["n_pairs"]}\n')
-        f.write(f'- Mean cost difference: {vals["mean_diff"]:.2f}\n')
-        f.write(f'- Wilcoxon p-value: {vals["wilcoxon_p"]:.4f}\n')
-        f.write(f'- 95% CI: [{vals["ci_95"][0]:.2f}, {vals["ci_95"][1]:.2f}]\n')
-        f.write(f"- Cohen's d: {vals['cohens_d']:.3f}\n")
-        f.write(f'- Significant (p<0.05): {"Yes" if vals["wilcoxon_p"] < 0.05 else "No"}\n\n')
-    f.write('## Interpretation\n\n')
-    f.write('The tests measure whether tour cost differences between the hybrid solver\n')
-    f.write('and baselines are systematic across instances and seeds. Small sample sizes\n')
-    f.write('(N=9 pairs) limit statistical power, so effect sizes (Cohen\'s d) provide\n')
-    f.write('additional insight into practical significance.\n')
-
-print('\n' + '=' * 60)
-print('Phase 4 experiments complete!')
-print('=' * 60)
+def _paired_costs(pivot, tl, comp_solver):
+    """Hybrid and comparison-solver costs aligned on (instance, seed) at one time limit."""
+    if (tl not in pivot.index.get_level_values('time_limit')
+            or not {'hybrid', comp_solver} <= set(pivot.columns)):
+        return np.array([]), np.array([])
+    sub = pivot.xs(tl, level='time_limit').dropna(subset=['hybrid', comp_solver])
+    return sub['hybrid'].values, sub[comp_solver].values
+
+
+def run_statistical_tests(full_results):
+    print('\n' + '=' * 60)
+    print('ITEM 021: Statistical Tests')
+    print('=' * 60)
+
+    from scipy import stats
+
+    # One (instance, seed, time limit) x solver table of valid 200-stop costs
+    df = pd.DataFrame(full_results)
+    pivot = df[(df['n_stops'] == 200) & df['valid']].pivot_table(
+        index=['instance_id', 'seed', 'time_limit'], columns='solver',
+        values='tour_cost', aggfunc='first')
+
+    stat_results = {}
+    for tl_test in [10.0, 30.0]:
+        for comp_name, comp_solver in [('hybrid_vs_lkh', 'lkh_style'), ('hybrid_vs_ortools', 'ortools')]:
+            costs_a, costs_b = _paired_costs(pivot, tl_test, comp_solver)
+            if len(costs_a) >= 3:
+                diffs = costs_a - costs_b
+                try:
+                    _, pw = stats.wilcoxon(costs_a, costs_b, alternative='two-sided')
+                except ValueError:
+                    # All differences are zero
+                    pw = 1.0
+                mean_diff = np.mean(diffs)
+                sd = np.std(diffs, ddof=1)
+                se = sd / np.sqrt(len(diffs))
+                stat_results[f'{comp_name}_{int(tl_test)}s'] = {
+                    'n_pairs': len(diffs),
+                    'mean_diff': float(mean_diff),
+                    'wilcoxon_p': float(pw),
+                    'ci_95': [float(mean_diff - 1.96 * se), float(mean_diff + 1.96 * se)],
+                    'cohens_d': float(mean_diff / (sd + 1e-10)),
+                }
+
+    # Paired comparison: hybrid vs lkh_style on 200-stop instances
+    for tl_test in [10.0, 30.0]:
+        vals = stat_results.get(f'hybrid_vs_lkh_{int(tl_test)}s')
+        if vals:
+            print(f'\nHybrid vs LKH-style (200-stop, {tl_test}s):')
+            print(f'  N pairs: {vals["n_pairs"]}')
+            print(f'  Mean diff: {vals["mean_diff"]:.2f}')
+            print(f'  Wilcoxon p: {vals["wilcoxon_p"]:.4f}')
+            print(f'  95% CI: [{vals["ci_95"][0]:.2f}, {vals["ci_95"][1]:.2f}]')
+            print(f"  Cohen's d: {vals['cohens_d']:.3f}")
+
+    # Also: hybrid vs OR-Tools
+    for tl_test in [10.0, 30.0]:
+        vals = stat_results.get(f'hybrid_vs_ortools_{int(tl_test)}s')
+        if vals:
+            print(f'\nHybrid vs OR-Tools (200-stop, {tl_test}s):')
+            print(f'  N={vals["n_pairs"]}, mean_diff={vals["mean_diff"]:.2f}, '
+                  f'p={vals["wilcoxon_p"]:.4f}, d={vals["cohens_d"]:.3f}')
+
+    with open('results/statistical_tests.json', 'w') as f:
+        json.dump(stat_results, f, indent=2)
+
+    # Write stats markdown
+    with open('results/statistical_tests.md', 'w') as f:
+        f.write('# Statistical Significance Testing\n\n')
+        f.write('## Methods\n')
+        f.write('- Wilcoxon signed-rank test (non-parametric paired test)\n')
+        f.write('- 95% confidence intervals for mean difference\n')
+        f.write("- Cohen's d effect size\n\n")
+        for key, vals in stat_results.items():
+            f.write(f'## {key}\n')
+            f.write(f'- Paired samples: {vals["n_pairs"]}\n')
+            f.write(f'- Mean cost difference: {vals["mean_diff"]:.2f}\n')
+            f.write(f'- Wilcoxon p-value: {vals["wilcoxon_p"]:.4f}\n')
+            f.write(f'- 95% CI: [{vals["ci_95"][0]:.2f}, {vals["ci_95"][1]:.2f}]\n')
+            f.write(f"- Cohen's d: {vals['cohens_d']:.3f}\n")
+            f.write(f'- Significant (p<0.05): {"Yes" if vals["wilcoxon_p"] < 0.05 else "No"}\n\n')
+        f.write('## Interpretation\n\n')
+        f.write('The tests measure whether tour cost differences between the hybrid solver\n')
+        f.write('and baselines are systematic across instances and seeds. Small sample sizes\n')
+        f.write('(N=9 pairs) limit statistical power, so effect sizes (Cohen\'s d) provide\n')
+        f.write('additional insight into practical significance.\n')
+
+    print('\n' + '=' * 60)
+    print('Phase 4 experiments complete!')
+    print('=' * 60)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run phase 4 experiments (items 018-021)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Worker processes for item 018 (default: os.cpu_count())')
+    args = parser.parse_args()
+
+    # The serial ablation runs get the same one-thread budget as the pool workers
+    _single_thread()
+    full_results = run_full_comparison(n_workers=args.workers)
+    run_ablation()
+    run_statistical_tests(full_results)
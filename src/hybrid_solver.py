@@ -52,6 +52,12 @@ def get_rl_agent():
     return _cached_rl_agent
 
 
+def reset_rl_agent():
+    """Drop the cached RL agent so the next hybrid run starts from a fresh one."""
+    global _cached_rl_agent
+    _cached_rl_agent = None
+
+
 def solve_hybrid(cost_matrix: np.ndarray,
                  coordinates: list = None,
                  time_limit_s: float = 30.0,